@@ -18,7 +18,7 @@ HOW TO USE (Windows):
 2. Open Command Prompt (or PowerShell) in the folder where bot.py is saved.
 3. Install required packages:
 
-   pip install python-telegram-bot[webhooks]==20.8 aiohttp humanize
+   pip install python-telegram-bot[webhooks,http2]==20.8 aiohttp humanize
 
 4. Edit BOT_TOKEN and GEOAPIFY_API_KEY below.
 5. Run the bot:
@@ -32,8 +32,11 @@ import asyncio
 import hmac
 import hashlib
 import random
+import struct
+import time
+from collections import OrderedDict
 from datetime import datetime, timedelta, timezone
-from typing import List, Tuple, Optional
+from typing import Dict, List, Tuple, Optional
 
 import aiohttp
 import humanize
@@ -41,10 +44,11 @@ from telegram import (
     Update,
     InlineKeyboardButton,
     InlineKeyboardMarkup,
-    InputFile,
 )
 from telegram.constants import ChatAction
+from telegram.request import HTTPXRequest
 from telegram.ext import (
+    Application,
     ApplicationBuilder,
     CommandHandler,
     MessageHandler,
@@ -63,11 +67,12 @@ GEOAPIFY_API_KEY = "OPTIONAL_GEOAPIFY_KEY"  # put real key for map image, or lea
 # ========= HELPER FUNCTIONS ===============
 
 DISCLAIMER = "⚠️ Simulation only. Real IMEI tracking is illegal without a court order."
+DISCLAIMER_SUFFIX = "\n\n" + DISCLAIMER
 
 
 def add_disclaimer(text: str) -> str:
     """Append the disclaimer to any message."""
-    return f"{text}\n\n{DISCLAIMER}"
+    return text + DISCLAIMER_SUFFIX
 
 
 def utc_now() -> datetime:
@@ -75,21 +80,30 @@ def utc_now() -> datetime:
     return datetime.now(timezone.utc)
 
 
+def format_utc(t: datetime) -> str:
+    """Format as 'YYYY-MM-DD HH:MM UTC' without going through strftime."""
+    return f"{t.year:04d}-{t.month:02d}-{t.day:02d} {t.hour:02d}:{t.minute:02d} UTC"
+
+
+# Luhn contribution of each ASCII digit. In a 15-digit IMEI the odd indices
+# (from the left) are the digits doubled by Luhn.
+LUHN_PLAIN = bytes.maketrans(b"0123456789", bytes(range(10)))
+LUHN_DOUBLED = bytes.maketrans(b"0123456789", bytes([0, 2, 4, 6, 8, 1, 3, 5, 7, 9]))
+
+
 def is_valid_imei(imei: str) -> bool:
     """
     Check if a string is a valid 15-digit IMEI using Luhn algorithm.
+
+    Uses bytes.translate lookup tables instead of a per-digit Python loop.
     """
-    if len(imei) != 15 or not imei.isdigit():
+    if len(imei) != 15:
         return False
+    b = imei.encode("ascii", "ignore")
+    if len(b) != 15 or b.translate(None, b"0123456789"):
+        return False  # non-ASCII or non-digit characters
 
-    total = 0
-    for i, ch in enumerate(reversed(imei)):
-        digit = int(ch)
-        if i % 2 == 1:  # every second digit from the right
-            digit *= 2
-            if digit > 9:
-                digit -= 9
-        total += digit
+    total = sum(b[0::2].translate(LUHN_PLAIN)) + sum(b[1::2].translate(LUHN_DOUBLED))
     return total % 10 == 0
 
 
@@ -98,31 +112,74 @@ def suffix_imei(imei: str) -> str:
     return imei[-4:]
 
 
+# [next 00:00 UTC as epoch seconds, today's seed string]
+# Refreshed only when the day rolls over, so handlers don't call strftime per message.
+_seed_cache: list = [0.0, ""]
+
+
+def _refresh_seed() -> str:
+    """Recompute today's seed and the next midnight; return the seed."""
+    now = utc_now()
+    tomorrow = (now + timedelta(days=1)).replace(
+        hour=0, minute=0, second=0, microsecond=0
+    )
+    _seed_cache[0] = tomorrow.timestamp()
+    _seed_cache[1] = now.strftime("%Y-%m-%d")
+    return _seed_cache[1]
+
+
 def daily_seed(dt: Optional[datetime] = None) -> str:
     """Return date string used as daily seed."""
-    if dt is None:
-        dt = utc_now()
-    return dt.strftime("%Y-%m-%d")
+    if dt is not None:
+        return dt.strftime("%Y-%m-%d")
+    if time.time() >= _seed_cache[0]:
+        return _refresh_seed()
+    return _seed_cache[1]
+
+
+def seconds_until_midnight_utc() -> int:
+    """How many seconds until 00:00 UTC."""
+    now = time.time()
+    if now >= _seed_cache[0]:
+        _refresh_seed()
+    return int(_seed_cache[0] - now)
 
 
-def hash_to_base_coord(imei: str, seed: str) -> Tuple[float, float]:
+# HMAC keyed with SECRET_KEY once; the inner/outer pad state is copied per call
+# instead of being re-derived from the key every time.
+_HMAC_BASE = hmac.new(SECRET_KEY.encode("utf-8"), digestmod=hashlib.sha256)
+
+
+def hmac_sha256(msg: bytes) -> bytes:
+    """Return HMAC-SHA256(msg, SECRET_KEY)."""
+    h = _HMAC_BASE.copy()
+    h.update(msg)
+    return h.digest()
+
+
+# Map a 64-bit integer onto the latitude / longitude span.
+LAT_SCALE = 170.0 / 2**64
+LON_SCALE = 360.0 / 2**64
+
+
+def derive_track_seed(imei: str, seed: str) -> Tuple[bytes, float, float]:
     """
-    Use HMAC-SHA256(IMEI + seed, SECRET_KEY) to get a base latitude/longitude.
+    Compute HMAC-SHA256(IMEI + seed, SECRET_KEY) once.
 
-    We map the bytes into:
+    Returns (digest, lat, lon): the digest also seeds the track RNG, and the
+    first 16 bytes are mapped into:
     - latitude in [-85, 85]
     - longitude in [-180, 180]
     """
-    key = SECRET_KEY.encode("utf-8")
-    msg = (imei + seed).encode("utf-8")
-    digest = hmac.new(key, msg, hashlib.sha256).digest()
+    digest = hmac_sha256((imei + seed).encode("utf-8"))
 
-    lat_int = int.from_bytes(digest[:8], "big")
-    lon_int = int.from_bytes(digest[8:16], "big")
+    lat_int, lon_int = struct.unpack_from(">QQ", digest)
+    return digest, lat_int * LAT_SCALE - 85.0, lon_int * LON_SCALE - 180.0
 
-    lat = (lat_int / 2**64) * 170.0 - 85.0
-    lon = (lon_int / 2**64) * 360.0 - 180.0
-    return lat, lon
+
+def map_enabled() -> bool:
+    """True when a real GEOAPIFY_API_KEY is configured."""
+    return bool(GEOAPIFY_API_KEY) and GEOAPIFY_API_KEY != "OPTIONAL_GEOAPIFY_KEY"
 
 
 async def generate_static_map(
@@ -134,7 +191,7 @@ async def generate_static_map(
 
     Returns bytes, or None if GEOAPIFY_API_KEY is missing or any error occurs.
     """
-    if not GEOAPIFY_API_KEY or GEOAPIFY_API_KEY == "OPTIONAL_GEOAPIFY_KEY":
+    if not map_enabled():
         return None  # map feature disabled
 
     if not coords:
@@ -163,75 +220,95 @@ async def generate_static_map(
         return None
 
 
-async def fake_track(imei: str):
+# Fake tracks are deterministic per (IMEI, daily seed), so we keep them in memory
+# for the rest of the day: (imei, seed) -> (points, map_bytes).
+# A failed map (None while the map feature is enabled) is retried on the next hit.
+# Oldest entries are dropped past TRACK_CACHE_MAX; the whole cache is cleared at 00:00 UTC.
+TRACK_CACHE_MAX = 10_000
+_track_cache: "OrderedDict[Tuple[str, str], Tuple[list, Optional[bytes]]]" = OrderedDict()
+
+
+async def fake_track(imei: str, session: aiohttp.ClientSession):
     """
     Generate a fake track for this IMEI.
 
+    `session` is the shared HTTP session created in post_init, so map
+    requests reuse pooled keep-alive connections.
+
     Returns (points, map_bytes, seed_date)
 
     - points: list of dicts with timestamp, lat, lon, address
     """
     now = utc_now()
-    seed = daily_seed(now)
-    base_lat, base_lon = hash_to_base_coord(imei, seed)
-
-    # deterministic random
-    digest = hmac.new(
-        SECRET_KEY.encode("utf-8"),
-        (imei + seed).encode("utf-8"),
-        hashlib.sha256,
-    ).digest()
+    seed = daily_seed()
+    seed_date = now.replace(hour=0, minute=0, second=0, microsecond=0)
+
+    key = (imei, seed)
+    cached = _track_cache.get(key)
+    if cached is not None:
+        _track_cache.move_to_end(key)
+        points, map_bytes = cached
+        if map_bytes is None and map_enabled():
+            map_bytes = await generate_static_map(
+                session, [(p["lat"], p["lon"]) for p in points]
+            )
+            if map_bytes is not None:
+                _track_cache[key] = (points, map_bytes)
+        return points, map_bytes, seed_date
+
+    # One HMAC gives both the base coordinate and the RNG seed.
+    digest, base_lat, base_lon = derive_track_seed(imei, seed)
     rnd = random.Random(int.from_bytes(digest, "big"))
 
-    coords: List[Tuple[float, float]] = []
-    for _ in range(5):
-        dlat = (rnd.random() - 0.5) * 0.6  # ±0.3°
-        dlon = (rnd.random() - 0.5) * 0.6
-        coords.append((base_lat + dlat, base_lon + dlon))
+    # 5 points within ±0.3° of the base, drawn in (lat, lon) order.
+    r = rnd.random
+    coords: List[Tuple[float, float]] = [
+        (base_lat + (r() - 0.5) * 0.6, base_lon + (r() - 0.5) * 0.6) for _ in range(5)
+    ]
 
     points = []
     start_time = now - timedelta(hours=24)
     current_time = start_time + timedelta(hours=rnd.uniform(0, 4))
 
-    async with aiohttp.ClientSession() as session:
-        for lat, lon in coords:
-            if current_time > now:
-                current_time = now - timedelta(minutes=rnd.randint(0, 60))
-
-            address = f"Near {lat:.3f}, {lon:.3f}"  # fake address
-            points.append(
-                {
-                    "time": current_time,
-                    "lat": lat,
-                    "lon": lon,
-                    "address": address,
-                }
-            )
-            current_time = current_time + timedelta(hours=rnd.uniform(2, 6))
-
-        # map image
-        map_bytes = await generate_static_map(
-            session, [(p["lat"], p["lon"]) for p in points]
+    for lat, lon in coords:
+        # Clamp to 'now'; earlier points are already <= now, so order is kept.
+        current_time = min(current_time, now)
+
+        address = f"Near {lat:.3f}, {lon:.3f}"  # fake address
+        points.append(
+            {
+                "time": current_time,
+                "lat": lat,
+                "lon": lon,
+                "address": address,
+            }
         )
+        current_time = current_time + timedelta(hours=rnd.uniform(2, 6))
 
-    points.sort(key=lambda p: p["time"])
-    seed_date = now.replace(hour=0, minute=0, second=0, microsecond=0)
+    # map image
+    map_bytes = await generate_static_map(
+        session, [(p["lat"], p["lon"]) for p in points]
+    )
+
+    _track_cache[key] = (points, map_bytes)
+    if len(_track_cache) > TRACK_CACHE_MAX:
+        _track_cache.popitem(last=False)
     return points, map_bytes, seed_date
 
 
-def seconds_until_midnight_utc() -> int:
-    """How many seconds until 00:00 UTC."""
-    now = utc_now()
-    tomorrow = (now + timedelta(days=1)).replace(
-        hour=0, minute=0, second=0, microsecond=0
-    )
-    delta = tomorrow - now
-    return int(delta.total_seconds())
+async def clear_track_cache_daily() -> None:
+    """Drop all cached tracks when the daily seed rotates at 00:00 UTC."""
+    while True:
+        await asyncio.sleep(seconds_until_midnight_utc() + 1)
+        _track_cache.clear()
 
 
-# Simple in-memory rate limit: user_id -> (count, date)
+# Simple in-memory rate limit: user_id -> (utc_day_number, count)
 # NOTE: If you restart the bot, this resets. For serious use, DB/Redis is better.
-rate_limit_state = {}
+DAILY_LIMIT = 3
+RATE_LIMIT_MAX_USERS = 1_000_000  # purge entries from past days beyond this
+rate_limit_state: Dict[int, Tuple[int, int]] = {}
+_rate_limit_purged_day = -1  # at most one purge per day; after it every entry is today's
 
 
 def check_rate_limit(user_id: int) -> Tuple[bool, int]:
@@ -240,22 +317,57 @@ def check_rate_limit(user_id: int) -> Tuple[bool, int]:
 
     Returns (allowed, remaining_seconds_until_reset)
     """
-    today = daily_seed()
-    entry = rate_limit_state.get(user_id)
+    global _rate_limit_purged_day
+    today = int(time.time() // 86400)  # days since epoch, rolls over at 00:00 UTC
+    day, count = rate_limit_state.get(user_id, (today, 0))
+    if day != today:
+        count = 0
 
-    if entry is None or entry["date"] != today:
-        rate_limit_state[user_id] = {"date": today, "count": 0}
-        entry = rate_limit_state[user_id]
-
-    if entry["count"] >= 3:
+    if count >= DAILY_LIMIT:
         return False, seconds_until_midnight_utc()
 
-    entry["count"] += 1
+    rate_limit_state[user_id] = (today, count + 1)
+    if len(rate_limit_state) > RATE_LIMIT_MAX_USERS and _rate_limit_purged_day != today:
+        _rate_limit_purged_day = today
+        for stale in [uid for uid, (d, _) in rate_limit_state.items() if d != today]:
+            del rate_limit_state[stale]
     return True, seconds_until_midnight_utc()
 
 
+# ========= LIFECYCLE ======================
+
+async def post_init(app: Application) -> None:
+    """Create shared resources: HTTP session, cache cleaner, share link template."""
+    app.bot_data["http"] = aiohttp.ClientSession(
+        connector=aiohttp.TCPConnector(limit=100, ttl_dns_cache=300, keepalive_timeout=75)
+    )
+    app.bot_data["cache_cleaner"] = asyncio.create_task(clear_track_cache_daily())
+
+    # The bot username never changes while running, so the share link template
+    # is built once here and handlers only fill in the IMEI.
+    me = await app.bot.get_me()
+    app.bot_data["deep_link_tmpl"] = f"https://t.me/{me.username}?start=imei_{{imei}}"
+
+
+async def post_shutdown(app: Application) -> None:
+    """Stop the cache cleaner and close the shared HTTP session."""
+    cleaner: Optional[asyncio.Task] = app.bot_data.get("cache_cleaner")
+    if cleaner:
+        cleaner.cancel()
+
+    session: Optional[aiohttp.ClientSession] = app.bot_data.get("http")
+    if session:
+        await session.close()
+
+
 # ========= HANDLERS =======================
 
+# Keyboards and buttons that never change are built once at import.
+START_MARKUP = InlineKeyboardMarkup([[InlineKeyboardButton("Track IMEI", callback_data="track")]])
+REPORT_BUTTON = InlineKeyboardButton("Report abuse", callback_data="report")
+DONATE_BUTTON = InlineKeyboardButton("Donate", callback_data="donate")
+
+
 async def start(update: Update, context: ContextTypes.DEFAULT_TYPE) -> None:
     """Handle /start command."""
     text = (
@@ -263,14 +375,9 @@ async def start(update: Update, context: ContextTypes.DEFAULT_TYPE) -> None:
         "Tap *Track IMEI* and send me a 15-digit IMEI. "
         "I will generate a fake, deterministic location history for it."
     )
-    keyboard = [
-        [InlineKeyboardButton("Track IMEI", callback_data="track")],
-    ]
-    markup = InlineKeyboardMarkup(keyboard)
-
     await update.effective_message.reply_text(
         add_disclaimer(text),
-        reply_markup=markup,
+        reply_markup=START_MARKUP,
         parse_mode="Markdown",
     )
 
@@ -308,63 +415,62 @@ async def handle_text(update: Update, context: ContextTypes.DEFAULT_TYPE) -> Non
         pretty = humanize.naturaldelta(delta)
         await message.reply_text(
             add_disclaimer(
-                f"⏳ You reached the daily limit of 3 checks.\n"
+                f"⏳ You reached the daily limit of {DAILY_LIMIT} checks.\n"
                 f"Please come back in {pretty}."
             )
         )
         return
 
-    # Typing / searching effect
+    # Typing / searching effect. The 3 second pause runs alongside the track
+    # generation and Telegram calls, so it no longer adds to the response time.
     await message.reply_text(add_disclaimer("🔍 Searching fake network data…"))
-    await context.bot.send_chat_action(
-        chat_id=message.chat_id, action=ChatAction.TYPING
-    )
-    await asyncio.sleep(3)
+    searching = asyncio.create_task(asyncio.sleep(3))
 
     # Generate fake track
-    points, map_bytes, seed_date = await fake_track(imei)
+    (points, map_bytes, seed_date), _ = await asyncio.gather(
+        fake_track(imei, context.bot_data["http"]),
+        context.bot.send_chat_action(chat_id=message.chat_id, action=ChatAction.TYPING),
+    )
+    await searching
 
     now = utc_now()
     lines = [
         f"Here is the *simulated* history for IMEI ending with `{suffix_imei(imei)}`:",
         "",
+        *[
+            f"• {format_utc(p['time'])} "
+            f"({humanize.naturaldelta(int((now - p['time']).total_seconds()))} ago) "
+            f"– {p['address']}"
+            for p in points
+        ],
     ]
 
-    for p in points:
-        rel = humanize.naturaldelta(now - p["time"])
-        lines.append(
-            f"• {p['time'].strftime('%Y-%m-%d %H:%M UTC')} "
-            f"({rel} ago) – {p['address']}"
-        )
-
     # Last seen
     last_point = points[-1]
-    last_seen_rel = humanize.naturaldelta(now - last_point["time"])
+    last_seen_rel = humanize.naturaldelta(int((now - last_point["time"]).total_seconds()))
     lines.append("")
     lines.append(f"Last seen {last_seen_rel} ago.")
 
     # Seed rotation info
     reset_secs = seconds_until_midnight_utc()
-    rotation_rel = humanize.naturaldelta(timedelta(seconds=reset_secs))
+    rotation_rel = humanize.naturaldelta(reset_secs)
     lines.append(f"Fake signal will refresh in {rotation_rel}.")
 
     # Buttons
-    deep_link = f"https://t.me/{(await context.bot.get_me()).username}?start=imei_{imei}"
-    keyboard = [
-        [InlineKeyboardButton("Share", url=deep_link)],
+    deep_link = context.bot_data["deep_link_tmpl"].format(imei=imei)
+    markup = InlineKeyboardMarkup(
         [
-            InlineKeyboardButton("Report abuse", callback_data="report"),
-            InlineKeyboardButton("Donate", callback_data="donate"),
-        ],
-    ]
-    markup = InlineKeyboardMarkup(keyboard)
+            [InlineKeyboardButton("Share", url=deep_link)],
+            [REPORT_BUTTON, DONATE_BUTTON],
+        ]
+    )
 
     caption = add_disclaimer("\n".join(lines))
 
     if map_bytes:
-        photo = InputFile(map_bytes, filename="track.png")
+        # PTB uploads raw bytes as-is; no need to wrap them in InputFile first.
         await message.reply_photo(
-            photo=photo,
+            photo=map_bytes,
             caption=caption,
             reply_markup=markup,
             parse_mode="Markdown",
@@ -410,9 +516,21 @@ def main() -> None:
     if BOT_TOKEN == "PUT_YOUR_BOT_TOKEN_HERE":
         raise RuntimeError("Please edit BOT_TOKEN at the top of bot.py")
 
+    # Bot API calls share one pool; the default is small enough that bursts of
+    # messages hit "All connections in the connection pool are occupied".
+    # HTTP/2 multiplexes many calls over each connection (needs the [http2] extra);
+    # drop http_version to fall back to HTTP/1.1 if a proxy doesn't support it.
+    api_request = HTTPXRequest(connection_pool_size=64, pool_timeout=20.0, http_version="2")
+    # getUpdates is a single long-poll at a time, so it needs only a small pool.
+    updates_request = HTTPXRequest(connection_pool_size=4, http_version="2")
+
     app = (
         ApplicationBuilder()
         .token(BOT_TOKEN)
+        .request(api_request)
+        .get_updates_request(updates_request)
+        .post_init(post_init)
+        .post_shutdown(post_shutdown)
         .build()
     )
 
@@ -0,0 +1,31 @@
+"""Materialized view with per-prefix IMEI query counts for /adminstats."""
+
+from alembic import op
+
+# Revision identifiers used by Alembic.
+revision = "0002_imei_prefix_counts"
+down_revision = "0001_initial"
+branch_labels = None
+depends_on = None
+
+
+def upgrade() -> None:
+    """Create imei_prefix_counts and its indexes."""
+    op.execute(
+        """
+        CREATE MATERIALIZED VIEW imei_prefix_counts AS
+        SELECT imei_prefix, count(*) AS c
+        FROM imei_queries
+        GROUP BY imei_prefix
+        """
+    )
+    # REFRESH ... CONCURRENTLY requires a unique index on the view.
+    op.execute(
+        "CREATE UNIQUE INDEX ix_imei_prefix_counts_prefix ON imei_prefix_counts (imei_prefix)"
+    )
+    op.execute("CREATE INDEX ix_imei_prefix_counts_c ON imei_prefix_counts (c DESC)")
+
+
+def downgrade() -> None:
+    """Drop the view (its indexes go with it)."""
+    op.execute("DROP MATERIALIZED VIEW IF EXISTS imei_prefix_counts")
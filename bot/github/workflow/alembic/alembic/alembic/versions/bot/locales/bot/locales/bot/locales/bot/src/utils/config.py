@@ -4,7 +4,7 @@ Configuration module using pydantic-settings.
 This reads environment variables and makes them available as 'settings'.
 """
 
-from functools import lru_cache
+from functools import cached_property, lru_cache
 from typing import List
 
 from dotenv import load_dotenv
@@ -29,12 +29,13 @@ class Settings(BaseSettings):
 
     model_config = SettingsConfigDict(env_file=".env", env_file_encoding="utf-8")
 
-    @property
+    @cached_property
     def admin_ids_list(self) -> List[int]:
         """
         Parse ADMIN_IDS (comma separated) into a list of integers.
 
         Any non-integer chunks are ignored to keep the bot robust.
+        Parsed once per Settings instance; ADMIN_IDS doesn't change at runtime.
         """
         ids: List[int] = []
         for chunk in self.ADMIN_IDS.split(","):
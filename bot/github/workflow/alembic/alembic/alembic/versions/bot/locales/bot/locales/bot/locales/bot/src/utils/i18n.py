@@ -2,18 +2,22 @@
 Very small i18n layer that loads translations from JSON files.
 
 We don't use heavy frameworks here; we just:
-- load locales/en.json, locales/es.json, etc.
+- load locales/en.json, locales/es.json, etc. once at import
 - pick messages by key and language code
 - fall back to English or configured fallback
 """
 
 from __future__ import annotations
 
-import json
 import os
-from functools import lru_cache
 from typing import Any, Dict
 
+try:
+    # orjson is a regular dependency; stdlib json keeps this importable without it.
+    from orjson import loads as _json_loads
+except ImportError:
+    from json import loads as _json_loads
+
 from telegram import Update
 
 from .config import settings
@@ -21,20 +25,32 @@ from .config import settings
 LOCALES_DIR = os.path.join(os.path.dirname(os.path.dirname(os.path.dirname(__file__))), "locales")
 
 
-@lru_cache
+def _load_all_locales() -> Dict[str, Dict[str, str]]:
+    """Parse every locales/*.json file into {lang: {key: text}}."""
+    locales: Dict[str, Dict[str, str]] = {}
+    for name in os.listdir(LOCALES_DIR):
+        if not name.endswith(".json"):
+            continue
+        with open(os.path.join(LOCALES_DIR, name), "rb") as f:
+            locales[name[: -len(".json")]] = _json_loads(f.read())
+    return locales
+
+
+# All translations are loaded once at import, so lookups never touch the filesystem.
+_LOCALES = _load_all_locales()
+_AVAILABLE_LANGS = frozenset(_LOCALES)
+
+
 def load_locale(lang: str) -> Dict[str, str]:
     """
-    Load a locale JSON file and return its dictionary.
+    Return the translation dictionary for a language.
 
-    If the file doesn't exist, fall back to English.
+    If we have no file for it, fall back to the configured locale (or empty).
     """
-    file_path = os.path.join(LOCALES_DIR, f"{lang}.json")
-    if not os.path.exists(file_path):
-        # Fallback to configured locale or English
-        file_path = os.path.join(LOCALES_DIR, f"{settings.LOCALE_FALLBACK}.json")
-
-    with open(file_path, "r", encoding="utf-8") as f:
-        return json.load(f)
+    data = _LOCALES.get(lang)
+    if data is None:
+        data = _LOCALES.get(settings.LOCALE_FALLBACK, {})
+    return data
 
 
 def get_lang_code(update: Update, explicit_lang: str | None = None) -> str:
@@ -50,7 +66,7 @@ def get_lang_code(update: Update, explicit_lang: str | None = None) -> str:
         return explicit_lang
 
     tg_lang = update.effective_user.language_code if update.effective_user else None
-    if tg_lang and os.path.exists(os.path.join(LOCALES_DIR, f"{tg_lang}.json")):
+    if tg_lang in _AVAILABLE_LANGS:
         return tg_lang
 
     return settings.LOCALE_FALLBACK
@@ -79,6 +95,16 @@ def add_disclaimer(lang: str, text: str) -> str:
 
     This helps us obey the rule that EVERY user-facing message must include it.
     """
-    disclaimer = t(lang, "disclaimer")
-    # Separate message and disclaimer with a blank line for readability.
-    return f"{text}\n\n{disclaimer}"
+    suffix = _DISCLAIMER_SUFFIX.get(lang)
+    if suffix is None:
+        suffix = _disclaimer_suffix(lang)
+    return text + suffix
+
+
+def _disclaimer_suffix(lang: str) -> str:
+    """Blank line + disclaimer, separating it from the message for readability."""
+    return "\n\n" + t(lang, "disclaimer")
+
+
+# Precomputed per language, so add_disclaimer is a single concatenation.
+_DISCLAIMER_SUFFIX: Dict[str, str] = {lang: _disclaimer_suffix(lang) for lang in _LOCALES}
@@ -6,31 +6,94 @@ We only VALIDATE and MASK IMEIs; we never store or log the full string.
 
 from __future__ import annotations
 
+from typing import List, Sequence
+
+try:
+    # Optional: only used by validate_imeis() for bulk scans (pip install .[batch]).
+    import numpy as np
+    from numba import njit, prange
+except ImportError:
+    njit = None
+
+
+# Luhn contribution of each ASCII digit, for bytes.translate.
+# For a 15-digit IMEI the digits at even indices (from the left) are kept as is
+# and the digits at odd indices are the "every second digit from the right"
+# that get doubled (minus 9 when above 9).
+_LUHN_PLAIN = bytes.maketrans(b"0123456789", bytes(range(10)))
+_LUHN_DOUBLED = bytes.maketrans(b"0123456789", bytes([0, 2, 4, 6, 8, 1, 3, 5, 7, 9]))
+
 
 def is_valid_imei(imei: str) -> bool:
     """
     Check if a string is a valid 15-digit IMEI using the Luhn algorithm.
 
     The algorithm:
-    - length must be 15 and digits only
+    - length must be 15 and ASCII digits only
     - double every second digit from the right
     - sum digits; result % 10 must be 0
+
+    The digit sums are done with two table lookups (bytes.translate) instead of
+    a per-character Python loop, since this runs on every incoming text message.
     """
-    if len(imei) != 15 or not imei.isdigit():
+    if len(imei) != 15:
+        return False
+    # Non-ASCII characters are dropped by "ignore" and so fail the length check;
+    # deleting all digits must leave nothing. Both are single C-level passes.
+    b = imei.encode("ascii", "ignore")
+    if len(b) != 15 or b.translate(None, b"0123456789"):
         return False
 
-    total = 0
-    # We process from right to left, keeping a position counter
-    for i, ch in enumerate(reversed(imei)):
-        digit = int(ch)
-        if i % 2 == 1:  # every second digit (Luhn)
-            digit *= 2
-            if digit > 9:
-                digit -= 9
-        total += digit
+    total = sum(b[0::2].translate(_LUHN_PLAIN)) + sum(b[1::2].translate(_LUHN_DOUBLED))
     return total % 10 == 0
 
 
+if njit is not None:
+
+    @njit(cache=True)
+    def _luhn_nb(b):
+        """Luhn check over 15 ASCII digit bytes (already known to be digits)."""
+        total = 0
+        for i in range(15):
+            d = b[14 - i] - 48
+            if i & 1:
+                d *= 2
+                if d > 9:
+                    d -= 9
+            total += d
+        return total % 10 == 0
+
+    @njit(cache=True, parallel=True)
+    def _luhn_batch_nb(arr, out):
+        """Run _luhn_nb over every row of an (N, 15) uint8 array."""
+        for i in prange(arr.shape[0]):
+            out[i] = _luhn_nb(arr[i])
+
+
+def validate_imeis(imeis: Sequence[str]) -> List[bool]:
+    """
+    Validate many IMEIs at once, e.g. for admin tools or abuse scans.
+
+    Uses a numba-compiled Luhn loop when numba is installed; otherwise it
+    falls back to calling is_valid_imei() on each item. Results are in input order.
+    """
+    if njit is None:
+        return [is_valid_imei(imei) for imei in imeis]
+
+    # Length/charset is checked in Python; only well-formed rows go to numba.
+    shaped = [len(imei) == 15 and imei.isascii() and imei.isdigit() for imei in imeis]
+    rows = [imei.encode("ascii") for imei, ok in zip(imeis, shaped, strict=True) if ok]
+    if not rows:
+        return [False] * len(imeis)
+
+    arr = np.frombuffer(b"".join(rows), dtype=np.uint8).reshape(-1, 15)
+    out = np.zeros(len(rows), dtype=np.bool_)
+    _luhn_batch_nb(arr, out)
+
+    checked = iter(out.tolist())
+    return [next(checked) if ok else False for ok in shaped]
+
+
 def mask_imei(imei: str) -> str:
     """
     Return a masked IMEI representation.
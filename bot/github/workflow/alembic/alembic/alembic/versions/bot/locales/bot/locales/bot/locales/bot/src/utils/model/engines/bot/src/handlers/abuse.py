@@ -4,6 +4,8 @@ Handler for "Report abuse" button.
 
 from __future__ import annotations
 
+import asyncio
+
 from redis.asyncio import Redis
 from sqlalchemy.ext.asyncio import AsyncSession
 from telegram import Update
@@ -15,6 +17,8 @@ from src.utils.config import settings
 from src.utils.i18n import add_disclaimer, get_lang_code, t
 from src.utils.time_utils import utc_now
 
+ADMIN_NOTIFY_CONCURRENCY = 8  # max admin messages in flight at once
+
 
 async def report_abuse_callback(update: Update, context: ContextTypes.DEFAULT_TYPE) -> None:
     """
@@ -37,11 +41,13 @@ async def report_abuse_callback(update: Update, context: ContextTypes.DEFAULT_TY
         if tg_user is None:
             break
 
+        # Flush a new user so its row precedes the report's foreign key; there
+        # is no relationship() for the unit of work to order them by.
         user = await db.get(User, tg_user.id)
         if user is None:
             user = User(id=tg_user.id, language_code=tg_user.language_code)
             db.add(user)
-            await db.commit()
+            await db.flush()
 
         report = AbuseReport(
             user_id=user.id,
@@ -52,12 +58,17 @@ async def report_abuse_callback(update: Update, context: ContextTypes.DEFAULT_TY
         db.add(report)
         await db.commit()
 
-    # Notify admins
-    for admin_id in settings.admin_ids_list:
-        try:
-            msg = f"Abuse report from user {update.effective_user.id}, IMEI suffix: {suffix}"
-            await context.bot.send_message(admin_id, msg)
-        except Exception:
-            continue
+    # Notify admins concurrently (bounded), so latency is the slowest send, not the sum.
+    msg = f"Abuse report from user {update.effective_user.id}, IMEI suffix: {suffix}"
+    sem = asyncio.Semaphore(ADMIN_NOTIFY_CONCURRENCY)
+
+    async def _notify(admin_id: int) -> None:
+        async with sem:
+            try:
+                await context.bot.send_message(admin_id, msg)
+            except Exception:
+                pass
+
+    await asyncio.gather(*(_notify(admin_id) for admin_id in settings.admin_ids_list))
 
     await query.edit_message_text(add_disclaimer(lang, t(lang, "report_received")))
@@ -6,12 +6,14 @@ Admin commands:
 
 from __future__ import annotations
 
-from typing import List
+import asyncio
+import logging
 
 from redis.asyncio import Redis
-from sqlalchemy import func, select
+from sqlalchemy import column, func, select, table, text
 from sqlalchemy.ext.asyncio import AsyncSession
 from telegram import Update
+from telegram.error import RetryAfter
 from telegram.ext import ContextTypes, ConversationHandler
 
 from src.models.base import get_session
@@ -20,6 +22,31 @@ from src.utils.config import settings
 from src.utils.i18n import add_disclaimer, get_lang_code, t
 
 BROADCAST_WAITING = 1  # conversation state
+BROADCAST_BATCH = 30  # Telegram allows about 30 messages per second per bot
+
+
+# Materialized view from migration 0002 (no ORM model; it's read-only).
+imei_prefix_counts = table("imei_prefix_counts", column("imei_prefix"), column("c"))
+PREFIX_COUNTS_REFRESH_SECONDS = 3600
+
+
+async def refresh_prefix_counts_forever() -> None:
+    """
+    Refresh imei_prefix_counts now and then every hour.
+
+    Started as a background task in on_startup. Refreshing before the first
+    sleep means a restart never leaves the view stale for another hour.
+    CONCURRENTLY keeps the view readable by /adminstats while it is being rebuilt.
+    """
+    log = logging.getLogger(__name__)
+    while True:
+        try:
+            async for db in get_session():
+                await db.execute(text("REFRESH MATERIALIZED VIEW CONCURRENTLY imei_prefix_counts"))
+                await db.commit()
+        except Exception:
+            log.exception("Failed to refresh imei_prefix_counts")
+        await asyncio.sleep(PREFIX_COUNTS_REFRESH_SECONDS)
 
 
 def is_admin(user_id: int) -> bool:
@@ -38,22 +65,21 @@ async def adminstats(update: Update, context: ContextTypes.DEFAULT_TYPE) -> None
         return
 
     async for db in get_session():
-        # Count users
-        user_count = (await db.execute(select(func.count()).select_from(User))).scalar_one()
-
-        # Count queries
-        query_count = (await db.execute(select(func.count()).select_from(IMEIQuery))).scalar_one()
-
-        # Count abuse reports
-        abuse_count = (
-            await db.execute(select(func.count()).select_from(AbuseReport))
-        ).scalar_one()
+        # Count users, queries and abuse reports in a single round trip.
+        # (One AsyncSession can't run statements concurrently, so the top-10
+        # query below still follows this one.)
+        stmt_counts = select(
+            select(func.count()).select_from(User).scalar_subquery(),
+            select(func.count()).select_from(IMEIQuery).scalar_subquery(),
+            select(func.count()).select_from(AbuseReport).scalar_subquery(),
+        )
+        user_count, query_count, abuse_count = (await db.execute(stmt_counts)).one()
 
-        # Top 10 IMEI prefixes
+        # Top 10 IMEI prefixes, read from the hourly-refreshed materialized view
+        # instead of grouping the whole imei_queries table on every call.
         stmt_top = (
-            select(IMEIQuery.imei_prefix, func.count().label("c"))
-            .group_by(IMEIQuery.imei_prefix)
-            .order_by(func.count().desc())
+            select(imei_prefix_counts.c.imei_prefix, imei_prefix_counts.c.c)
+            .order_by(imei_prefix_counts.c.c.desc())
             .limit(10)
         )
         result = await db.execute(stmt_top)
@@ -92,6 +118,27 @@ async def broadcast_start(update: Update, context: ContextTypes.DEFAULT_TYPE) ->
     return BROADCAST_WAITING
 
 
+async def _send_broadcast(context: ContextTypes.DEFAULT_TYPE, uid: int, text: str) -> int:
+    """
+    Send one broadcast message; return 1 if delivered, 0 otherwise.
+
+    Errors are ignored so one bad user doesn't stop the broadcast.
+    """
+    try:
+        await context.bot.send_message(uid, text)
+        return 1
+    except RetryAfter as exc:
+        # Flood control: wait as told and try this user once more.
+        await asyncio.sleep(exc.retry_after)
+        try:
+            await context.bot.send_message(uid, text)
+            return 1
+        except Exception:
+            return 0
+    except Exception:
+        return 0
+
+
 async def broadcast_send(update: Update, context: ContextTypes.DEFAULT_TYPE) -> int:
     """
     Receive broadcast message from admin and send to all users.
@@ -99,20 +146,23 @@ async def broadcast_send(update: Update, context: ContextTypes.DEFAULT_TYPE) ->
     lang = get_lang_code(update)
     text_to_send = update.effective_message.text
 
-    async for db in get_session():
-        # fetch all user IDs
-        stmt = select(User.id)
-        result = await db.execute(stmt)
-        user_ids: List[int] = [row[0] for row in result.all()]
-
-    # Send message to each user. Errors are ignored so one bad user doesn't stop loop.
     count = 0
-    for uid in user_ids:
-        try:
-            await context.bot.send_message(uid, text_to_send)
-            count += 1
-        except Exception:
-            continue
+    async for db in get_session():
+        # Stream user IDs through a server-side cursor and send each wave as soon
+        # as it is fetched, instead of loading every ID into memory first.
+        user_ids = await db.stream_scalars(select(User.id))
+
+        # Send in concurrent waves of BROADCAST_BATCH, one wave per second, to stay
+        # under Telegram's global limit. AIORateLimiter still handles any 429s.
+        first = True
+        async for batch in user_ids.partitions(BROADCAST_BATCH):
+            if not first:
+                await asyncio.sleep(1.0)
+            first = False
+            sent = await asyncio.gather(
+                *(_send_broadcast(context, uid, text_to_send) for uid in batch)
+            )
+            count += sum(sent)
 
     await update.effective_message.reply_text(
         add_disclaimer(lang, t(lang, "admin_broadcast_done", count=count))
@@ -11,6 +11,7 @@ import asyncio
 import logging
 from typing import Any, Dict
 
+import aiohttp
 import redis.asyncio as redis
 from telegram.ext import (
     AIORateLimiter,
@@ -30,26 +31,55 @@ from src.handlers.admin import (
     broadcast_cancel,
     broadcast_send,
     broadcast_start,
+    refresh_prefix_counts_forever,
 )
-from src.handlers.imei import handle_imei_message
+from src.handlers.imei import IMEI_TEXT_PATTERN, handle_imei_message, handle_non_imei_text
 from src.handlers.lang import lang_callback, lang_command
 from src.handlers.start import start, start_track_callback
 from src.utils.config import settings
 from src.utils.logging import setup_logging
 
+REDIS_MAX_CONNECTIONS = 64
+
 
 async def on_startup(app: Application) -> None:
-    """Run on application startup: connect Redis and store in bot_data."""
-    # Connect Redis and store client so handlers can use it.
-    app.bot_data["redis"] = redis.from_url(settings.REDIS_URL, decode_responses=False)
+    """Run on application startup: connect Redis and HTTP, cache bot info in bot_data."""
+    # Connect Redis and store client so handlers can use it. An explicit pool
+    # bounds how many connections concurrent handlers can open.
+    pool = redis.ConnectionPool.from_url(
+        settings.REDIS_URL, max_connections=REDIS_MAX_CONNECTIONS, decode_responses=False
+    )
+    app.bot_data["redis"] = redis.Redis(connection_pool=pool)
     logging.getLogger(__name__).info("Connected Redis client")
 
+    # One HTTP session for all OSRM / Geoapify calls, so connections are reused.
+    app.bot_data["http"] = aiohttp.ClientSession(
+        connector=aiohttp.TCPConnector(limit=100, ttl_dns_cache=300, keepalive_timeout=60)
+    )
+
+    # Bot username is fixed for the process lifetime; handlers use it for deep links.
+    me = await app.bot.get_me()
+    app.bot_data["bot_username"] = me.username
+
+    # Keep the /adminstats top-prefixes view fresh.
+    app.bot_data["prefix_counts_task"] = asyncio.create_task(refresh_prefix_counts_forever())
+
 
 async def on_shutdown(app: Application) -> None:
-    """Run on application shutdown: close Redis connection."""
+    """Run on application shutdown: close HTTP session and Redis connection."""
+    task: asyncio.Task | None = app.bot_data.get("prefix_counts_task")
+    if task:
+        task.cancel()
+
+    http: aiohttp.ClientSession | None = app.bot_data.get("http")
+    if http:
+        await http.close()
+
     redis_client: redis.Redis | None = app.bot_data.get("redis")
     if redis_client:
         await redis_client.aclose()
+        # The pool was created by us, so Redis.aclose() leaves it open.
+        await redis_client.connection_pool.disconnect()
         logging.getLogger(__name__).info("Closed Redis client")
 
 
@@ -89,8 +119,16 @@ def build_application() -> Application:
     application.add_handler(CallbackQueryHandler(report_abuse_callback, pattern="^donate$"), group=1)
 
     # === Message handlers ===
-    # IMEI numbers are plain text; we keep it simple and send all TEXT to IMEI handler.
-    application.add_handler(MessageHandler(filters.TEXT & ~filters.COMMAND, handle_imei_message))
+    # Only 15-digit text reaches the IMEI handler; PTB matches the regex before
+    # scheduling it, so ordinary chatter never runs that coroutine.
+    application.add_handler(
+        MessageHandler(
+            filters.TEXT & ~filters.COMMAND & filters.Regex(IMEI_TEXT_PATTERN),
+            handle_imei_message,
+        )
+    )
+    # Any other text just gets the "invalid IMEI" hint.
+    application.add_handler(MessageHandler(filters.TEXT & ~filters.COMMAND, handle_non_imei_text))
 
     return application
 
@@ -0,0 +1,70 @@
+"""
+Basic tests for fake tracking engine.
+
+We don't hit external APIs; instead we just verify deterministic behavior
+by calling the lower-level helpers.
+"""
+
+from datetime import UTC, datetime
+
+from src.engines.fake_tracking import (
+    FakeLocationPoint,
+    FakeTrackResult,
+    _coord_from_digest,
+    _daily_seed,
+    _track_digest,
+    _track_randoms,
+    pack_track,
+    track_digest,
+    unpack_track,
+)
+
+
+def test_daily_seed_changes_per_day():
+    d1 = datetime(2024, 1, 1)
+    d2 = datetime(2024, 1, 2)
+    assert _daily_seed(d1) != _daily_seed(d2)
+
+
+def test_base_coord_deterministic():
+    imei = "490154203237518"
+    seed = "2024-01-01"
+    c1 = _coord_from_digest(_track_digest(imei, seed))
+    c2 = _coord_from_digest(_track_digest(imei, seed))
+    assert c1 == c2
+    # Coordinates should be in plausible range
+    lat, lon = c1
+    assert -90 <= lat <= 90
+    assert -180 <= lon <= 180
+
+
+def test_track_randoms_deterministic():
+    digest = _track_digest("490154203237518", "2024-01-01")
+    values = _track_randoms(digest)
+    assert values == _track_randoms(digest)
+    assert len(values) == 16
+    assert all(0.0 <= v < 1.0 for v in values)
+
+
+def test_track_digest_cache_id_hides_imei():
+    imei = "490154203237518"
+    key = track_digest(imei, datetime(2024, 1, 1)).hex()
+    assert imei not in key
+    assert key == _track_digest(imei, "2024-01-01").hex()
+    assert key != track_digest(imei, datetime(2024, 1, 2)).hex()
+
+
+def test_pack_track_roundtrip():
+    result = FakeTrackResult(
+        imei_prefix="49015420",
+        points=[
+            FakeLocationPoint(
+                timestamp=datetime(2024, 1, 1, 3, 30, tzinfo=UTC),
+                coord=(12.5, -45.25),
+                address="Near 12.500, -45.250",
+            )
+        ],
+        map_png=b"\x89PNG fake",
+        seed_date=datetime(2024, 1, 1, tzinfo=UTC),
+    )
+    assert unpack_track(pack_track(result)) == result
@@ -4,7 +4,9 @@ Simple tests for IMEI helper functions.
 We use pytest; run with `pytest -q`.
 """
 
-from src.utils.imei import is_valid_imei, mask_imei, suffix_imei
+import pytest
+
+from src.utils.imei import is_valid_imei, mask_imei, suffix_imei, validate_imeis
 
 
 def test_valid_imei():
@@ -20,6 +22,40 @@ def test_invalid_imei_chars():
     assert not is_valid_imei("49015420323751X")
 
 
+def test_invalid_imei_non_ascii_digits():
+    # Unicode digits pass str.isdigit() but are not IMEIs.
+    assert not is_valid_imei("49015420323751\u0968")
+
+
+def test_invalid_imei_checksum():
+    assert not is_valid_imei("490154203237519")
+
+
+def test_validate_imeis_matches_single():
+    imeis = ["490154203237518", "490154203237519", "12345", "49015420323751X", ""]
+    assert validate_imeis(imeis) == [is_valid_imei(imei) for imei in imeis]
+
+
+def test_validate_imeis_numba_path():
+    # Runs the compiled batch kernel; skipped unless the "batch" extra is installed.
+    pytest.importorskip("numba")
+    imeis = [
+        "490154203237518",  # valid
+        "356938035643808",  # bad checksum
+        "12345",  # too short
+        "356938035643809",  # valid
+        "49015420323751X",  # non-digit
+        "35693803564380\u0968",  # non-ASCII digit
+        "490154203237519",  # bad checksum
+    ]
+    assert validate_imeis(imeis) == [True, False, False, True, False, False, False]
+
+
+def test_validate_imeis_numba_no_well_formed_rows():
+    pytest.importorskip("numba")
+    assert validate_imeis(["12345", ""]) == [False, False]
+
+
 def test_mask_imei():
     masked = mask_imei("490154203237518")
     assert masked.startswith("49015420")
@@ -0,0 +1,67 @@
+"""
+Tests for the Redis side of the rate limiter.
+
+We use fakeredis instead of a real server; the PostgreSQL side is not covered here.
+"""
+
+import pytest
+from fakeredis.aioredis import FakeRedis
+
+from src.engines.rate_limit import (
+    DAILY_LIMIT,
+    RateLimitStatus,
+    _rate_key,
+    consume_token,
+    store_rate_limit,
+)
+
+USER_ID = 12345
+
+
+@pytest.fixture
+def redis():
+    return FakeRedis(decode_responses=True)
+
+
+@pytest.mark.asyncio
+async def test_first_call_allowed(redis):
+    status = await consume_token(redis, USER_ID)
+    assert status.allowed
+    assert status.remaining == DAILY_LIMIT - 1
+    assert status.reset_in_seconds > 0
+
+
+@pytest.mark.asyncio
+async def test_call_over_limit_rejected(redis):
+    for _ in range(DAILY_LIMIT):
+        assert (await consume_token(redis, USER_ID)).allowed
+
+    status = await consume_token(redis, USER_ID)
+    assert not status.allowed
+    assert status.remaining == 0
+    # The counter is left above the limit, not decremented back.
+    assert int(await redis.get(_rate_key(USER_ID))) == DAILY_LIMIT + 1
+
+
+@pytest.mark.asyncio
+async def test_ttl_set_only_once(redis):
+    await consume_token(redis, USER_ID)
+    key = _rate_key(USER_ID)
+    await redis.expire(key, 100)
+
+    status = await consume_token(redis, USER_ID)
+    assert 0 < await redis.ttl(key) <= 100
+    assert status.reset_in_seconds <= 100
+
+
+@pytest.mark.asyncio
+async def test_store_rate_limit_overwrites_drift(redis):
+    key = _rate_key(USER_ID)
+    await redis.set(key, DAILY_LIMIT)  # Redis thinks the quota is used up
+
+    await store_rate_limit(
+        redis, USER_ID, RateLimitStatus(allowed=True, remaining=2, reset_in_seconds=500)
+    )
+    assert int(await redis.get(key)) == DAILY_LIMIT - 2
+    assert 0 < await redis.ttl(key) <= 500
+    assert (await consume_token(redis, USER_ID)).allowed
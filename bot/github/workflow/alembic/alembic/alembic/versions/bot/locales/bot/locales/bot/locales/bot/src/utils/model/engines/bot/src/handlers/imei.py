@@ -10,38 +10,53 @@ This:
 
 from __future__ import annotations
 
-from datetime import timedelta
+from datetime import datetime, timedelta
 
 from redis.asyncio import Redis
-from sqlalchemy.ext.asyncio import AsyncSession
-from telegram import InlineKeyboardButton, InlineKeyboardMarkup, InputFile, Update
+from telegram import InlineKeyboardButton, InlineKeyboardMarkup, Update
 from telegram.ext import ContextTypes
 
-from src.engines.fake_tracking import FakeTrackResult, generate_fake_track
-from src.engines.rate_limit import check_rate_limit, increment_rate_limit
+from src.engines.fake_tracking import (
+    FakeTrackResult,
+    generate_fake_track,
+    pack_track,
+    track_digest,
+    unpack_track,
+)
+from src.engines.rate_limit import consume_token, record_imei_query, store_rate_limit
 from src.models.base import get_session
-from src.models.user import IMEIQuery, User
 from src.utils.config import settings
+from src.utils.geo import generate_static_map
 from src.utils.i18n import add_disclaimer, get_lang_code, t
 from src.utils.imei import is_valid_imei, mask_imei, suffix_imei
 from src.utils.time_utils import humanize_delta, seconds_until_midnight_utc, utc_now
 from .common import reply_with_disclaimer
 
+# Text that looks like an IMEI (15 ASCII digits, surrounding spaces allowed).
+IMEI_TEXT_PATTERN = r"^\s*[0-9]{15}\s*$"
 
-async def ensure_user(db: AsyncSession, update: Update) -> User:
+
+def _format_timestamp(ts: datetime) -> str:
     """
-    Ensure we have a User row for this Telegram user.
+    Format a UTC timestamp as YYYY-MM-DDTHH:MM:SSZ.
 
-    If missing, create one.
+    Plain attribute formatting is cheaper than isoformat() and drops the
+    microseconds and '+00:00' offset nobody needs in a chat message.
     """
-    tg_user = update.effective_user
-    assert tg_user is not None
-    user = await db.get(User, tg_user.id)
-    if user is None:
-        user = User(id=tg_user.id, language_code=tg_user.language_code)
-        db.add(user)
-        await db.commit()
-    return user
+    return (
+        f"{ts.year:04d}-{ts.month:02d}-{ts.day:02d}"
+        f"T{ts.hour:02d}:{ts.minute:02d}:{ts.second:02d}Z"
+    )
+
+
+async def handle_non_imei_text(update: Update, context: ContextTypes.DEFAULT_TYPE) -> None:
+    """
+    Reply to text that is not a valid IMEI.
+
+    A single message, so ordinary chatter costs one Bot API call.
+    """
+    lang = get_lang_code(update)
+    await reply_with_disclaimer(update, context, t(lang, "invalid_imei"))
 
 
 async def handle_imei_message(update: Update, context: ContextTypes.DEFAULT_TYPE) -> None:
@@ -49,79 +64,95 @@ async def handle_imei_message(update: Update, context: ContextTypes.DEFAULT_TYPE
     Handle a plain text message that may contain an IMEI.
 
     This is triggered after user presses 'Track IMEI' and sends a number.
+    Only text matching IMEI_TEXT_PATTERN is routed here (see build_application).
     """
     lang = get_lang_code(update)
     message = update.effective_message
     text = message.text.strip()
 
-    # Validate format first.
+    # The handler filter only lets 15-digit text through; this is the Luhn check.
     if not is_valid_imei(text):
-        await reply_with_disclaimer(update, context, t(lang, "invalid_imei"))
+        await handle_non_imei_text(update, context)
         return
 
     imei = text
 
     # Connect to Redis and Postgres.
     redis: Redis = context.bot_data["redis"]
-    async for db in get_session():
-        # Ensure user exists.
-        user = await ensure_user(db, update)
-
-        # Check rate limit.
-        status = await check_rate_limit(redis, db, user.id)
-        if not status.allowed:
-            # Show user how long to wait.
-            delta = timedelta(seconds=status.reset_in_seconds)
-            human = humanize_delta(delta)
-            await reply_with_disclaimer(
-                update,
-                context,
-                t(lang, "rate_limited", time_left=human),
-            )
-            return
-
-        # Increment usage now that request is accepted.
-        await increment_rate_limit(redis, user.id)
+    tg_user = update.effective_user
+    assert tg_user is not None
 
-        # Record query with masked IMEI prefix.
-        masked = mask_imei(imei)
-        q = IMEIQuery(user_id=user.id, imei_prefix=masked)
-        db.add(q)
-        await db.commit()
+    # Redis fast path: users already at the limit never reach Postgres.
+    status = await consume_token(redis, tg_user.id)
+    if status.allowed:
+        async for db in get_session():
+            # Ensure user exists, check today's count and record the query with
+            # masked IMEI prefix, all in one statement.
+            db_status = await record_imei_query(
+                db, tg_user.id, tg_user.language_code, mask_imei(imei)
+            )
+            await db.commit()
+        if db_status.remaining != status.remaining:
+            # Postgres is authoritative; resync the Redis counter.
+            await store_rate_limit(redis, tg_user.id, db_status)
+        status = db_status
+
+    if not status.allowed:
+        # Show user how long to wait.
+        delta = timedelta(seconds=status.reset_in_seconds)
+        human = humanize_delta(delta)
+        await reply_with_disclaimer(
+            update,
+            context,
+            t(lang, "rate_limited", time_left=human),
+        )
+        return
 
     # Show "searching" message with typing delay.
     searching_text = t(lang, "searching")
     await reply_with_disclaimer(update, context, searching_text)
     await context.bot.send_chat_action(chat_id=message.chat_id, action="typing")
 
-    # Check Redis cache for this IMEI first.
-    cache_key = f"track:imei:{imei}"
-    cached = await redis.get(cache_key)
+    # Check Redis cache for this IMEI first. The track only changes when the
+    # daily seed rotates, so a cached copy is valid until midnight UTC. The same
+    # goes for the Telegram file_id of a map we already uploaded today.
+    # Keys use the track digest, never the full IMEI.
+    http = context.bot_data["http"]
+    digest = track_digest(imei)
+    track_id = digest.hex()
+    cache_key = f"track:{track_id}"
+    file_id_key = f"track:file_id:{track_id}"
+    cached, file_id = await redis.mget(cache_key, file_id_key)
     if cached:
-        # If we stored compressed result, we would deserialize here.
-        # For brevity, we regenerate even if cache exists; but you can expand
-        # this to store JSON + base64 map.
-        pass
-
-    # Generate fake track (deterministic).
-    result: FakeTrackResult = await generate_fake_track(imei)
-
-    # Cache marker for 1 hour to satisfy requirement.
-    await redis.set(cache_key, "1", ex=3600)
+        result: FakeTrackResult = unpack_track(cached)
+    else:
+        # Generate fake track (deterministic); no need to render a map Telegram has.
+        result = await generate_fake_track(
+            imei, http, render_map=file_id is None, digest=digest
+        )
+        # The countdown is 0 in the last second of the day; Redis rejects EX 0.
+        await redis.set(cache_key, pack_track(result), ex=max(1, seconds_until_midnight_utc()))
+
+    if file_id is None and not result.map_png:
+        # Cached without a map, but the file_id has gone; render it again.
+        result.map_png = await generate_static_map(http, [p.coord for p in result.points])
 
     # Build response.
     suffix = suffix_imei(imei)
     header = t(lang, "imei_result_header", suffix=suffix)
 
     # Build history text.
-    lines = [header, ""]
     now = utc_now()
-
-    for point in result.points:
-        # Relative time (e.g. "3 hours ago").
-        rel = humanize_delta(now - point.timestamp)
-        line = f"• {point.timestamp.isoformat()} ({rel}) – {point.address}"
-        lines.append(line)
+    # Relative time per point (e.g. "3 hours ago"); the last one doubles as "last seen".
+    rels = [humanize_delta(now - point.timestamp) for point in result.points]
+    lines = [
+        header,
+        "",
+        *[
+            f"• {_format_timestamp(point.timestamp)} ({rel}) – {point.address}"
+            for point, rel in zip(result.points, rels, strict=True)
+        ],
+    ]
 
     # Seed rotation countdown.
     seconds_left = seconds_until_midnight_utc()
@@ -131,16 +162,13 @@ async def handle_imei_message(update: Update, context: ContextTypes.DEFAULT_TYPE
     lines.append(t(lang, "seed_rotation", time_left=rotation_str))
 
     # Last seen info.
-    last_point = result.points[-1]
-    last_seen_rel = humanize_delta(now - last_point.timestamp)
-    lines.append(t(lang, "last_seen", relative_time=last_seen_rel))
+    lines.append(t(lang, "last_seen", relative_time=rels[-1]))
 
     body = "\n".join(lines)
 
     # Inline keyboard with Share / Report / Donate.
-    # For Share, we construct a deeplink. We need bot username from context.
-    bot_info = await context.bot.get_me()
-    bot_username = bot_info.username
+    # For Share, we construct a deeplink from the username cached at startup.
+    bot_username = context.bot_data["bot_username"]
 
     deep_link = f"https://t.me/{bot_username}?start=imei_{imei}"
     keyboard = [
@@ -160,7 +188,13 @@ async def handle_imei_message(update: Update, context: ContextTypes.DEFAULT_TYPE
     ]
     markup = InlineKeyboardMarkup(keyboard)
 
-    # Send map as photo with caption.
+    # Send map as photo with caption; reuse the uploaded file when we have one.
     caption = add_disclaimer(lang, body)
-    photo_file = InputFile(result.map_png, filename="track.png")
-    await update.effective_message.reply_photo(photo=photo_file, caption=caption, reply_markup=markup)
+    photo = file_id.decode() if file_id else result.map_png
+    sent = await update.effective_message.reply_photo(
+        photo=photo, caption=caption, reply_markup=markup
+    )
+    if file_id is None and sent.photo:
+        await redis.set(
+            file_id_key, sent.photo[-1].file_id, ex=max(1, seconds_until_midnight_utc())
+        )
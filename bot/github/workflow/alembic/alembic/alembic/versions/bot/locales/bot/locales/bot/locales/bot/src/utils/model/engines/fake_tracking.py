@@ -10,16 +10,18 @@ Responsible for generating:
 
 from __future__ import annotations
 
+import asyncio
 import base64
 import hashlib
 import hmac
 import math
-import random
+import struct
 from dataclasses import dataclass
 from datetime import UTC, datetime, timedelta
 from typing import List, Tuple
 
 import aiohttp
+import msgpack
 
 from src.utils.config import settings
 from src.utils.geo import Coordinate, generate_static_map, snap_to_road
@@ -52,35 +54,80 @@ def _daily_seed(now: datetime | None = None) -> str:
     return now.strftime("%Y-%m-%d")
 
 
-def _hash_to_base_coord(imei: str, seed: str) -> Coordinate:
+# Precomputed multipliers mapping a 64-bit integer onto the lat/lon span / [0, 1).
+_LAT_SCALE = 170.0 / 2**64
+_LON_SCALE = 360.0 / 2**64
+_UNIT_SCALE = 1.0 / 2**64
+
+
+def _track_digest(imei: str, seed: str) -> bytes:
     """
-    Use HMAC-SHA256(IMEI + daily_seed, SECRET_KEY) to produce a base lat/lon.
+    Compute HMAC-SHA256(IMEI + daily_seed, SECRET_KEY).
 
-    We map the hash into roughly valid latitude and longitude ranges.
+    This single digest is the only source of randomness for a track.
     """
     key = settings.SECRET_KEY.encode("utf-8")
     msg = (imei + seed).encode("utf-8")
-    digest = hmac.new(key, msg, hashlib.sha256).digest()
+    return hmac.new(key, msg, hashlib.sha256).digest()
 
-    # Use first 8 bytes for latitude, next 8 bytes for longitude.
-    lat_int = int.from_bytes(digest[:8], "big")
-    lon_int = int.from_bytes(digest[8:16], "big")
+
+def _coord_from_digest(digest: bytes) -> Coordinate:
+    """
+    Turn the track digest into a base lat/lon.
+
+    We map the hash into roughly valid latitude and longitude ranges.
+    """
+    # Use first 8 bytes for latitude, next 8 bytes for longitude (big-endian).
+    lat_int, lon_int = struct.unpack_from(">QQ", digest)
 
     # Map to ranges:
     # lat in [-85, 85], lon in [-180, 180]
-    lat = (lat_int / 2**64) * 170.0 - 85.0
-    lon = (lon_int / 2**64) * 360.0 - 180.0
+    lat = lat_int * _LAT_SCALE - 85.0
+    lon = lon_int * _LON_SCALE - 180.0
 
     return lat, lon
 
 
-async def generate_fake_track(imei: str) -> FakeTrackResult:
+def _track_randoms(digest: bytes) -> List[float]:
+    """
+    Expand the track digest into 16 deterministic floats in [0, 1).
+
+    We hash digest + counter byte with SHA-256 (4 blocks = 16 x 64-bit values).
+    A track needs only 16 draws, so this is cheaper than seeding random.Random.
+    """
+    stream = b"".join(hashlib.sha256(digest + bytes((i,))).digest() for i in range(4))
+    return [n * _UNIT_SCALE for n in struct.unpack(">16Q", stream)]
+
+
+def track_digest(imei: str, now: datetime | None = None) -> bytes:
+    """
+    Return today's track digest for this IMEI.
+
+    Callers use its hex form as the Redis cache id, so cache keys never contain
+    the IMEI itself and change when the daily seed rotates. Pass it on to
+    generate_fake_track() so the HMAC is computed only once.
+    """
+    return _track_digest(imei, _daily_seed(now))
+
+
+async def generate_fake_track(
+    imei: str,
+    session: aiohttp.ClientSession,
+    render_map: bool = True,
+    digest: bytes | None = None,
+) -> FakeTrackResult:
     """
     Generate a deterministic fake track for a given IMEI.
 
+    `session` is the app-wide HTTP session (bot_data["http"]), so OSRM and
+    Geoapify requests reuse pooled keep-alive connections. With
+    render_map=False the Geoapify call is skipped and map_png is b"" (used when
+    Telegram already has today's map for this IMEI). `digest` is today's
+    track_digest() when the caller already has it.
+
     Steps:
-    1. Compute daily seed and base coordinate.
-    2. Use a random.Random seeded from hash to generate small offsets.
+    1. Compute daily seed, the track digest and base coordinate.
+    2. Expand the digest into the random values for offsets and time gaps.
     3. Pick 5 time points in the last 24 hours, 2–6 hours apart.
     4. Optionally snap each coordinate to nearest road (OSRM).
     5. Generate static map PNG with a polyline over the points.
@@ -88,55 +135,46 @@ async def generate_fake_track(imei: str) -> FakeTrackResult:
     now = utc_now()
     seed_str = _daily_seed(now)
 
-    base_lat, base_lon = _hash_to_base_coord(imei, seed_str)
-
-    # Seed deterministic random generator with HMAC again for stable results.
-    seed_digest = hmac.new(
-        settings.SECRET_KEY.encode("utf-8"),
-        (imei + seed_str).encode("utf-8"),
-        hashlib.sha256,
-    ).digest()
-    seed_int = int.from_bytes(seed_digest, "big")
-    rnd = random.Random(seed_int)
+    if digest is None:
+        digest = _track_digest(imei, seed_str)
+    base_lat, base_lon = _coord_from_digest(digest)
+    rnd = _track_randoms(digest)  # [0:10] offsets, [10] start, [11:16] gaps
 
     # Generate 5 coordinates around base point within ±0.3 degrees.
-    coords: List[Coordinate] = []
-    for _ in range(5):
-        dlat = (rnd.random() - 0.5) * 0.6  # (-0.3, 0.3)
-        dlon = (rnd.random() - 0.5) * 0.6
-        coords.append((base_lat + dlat, base_lon + dlon))
+    coords: List[Coordinate] = [
+        (base_lat + (rnd[2 * i] - 0.5) * 0.6, base_lon + (rnd[2 * i + 1] - 0.5) * 0.6)
+        for i in range(5)
+    ]
 
-    # Generate times in the last 24 hours.
+    # Generate times in the last 24 hours, starting 0–4 hours after the window opens.
     points: List[FakeLocationPoint] = []
     start_time = now - timedelta(hours=24)
-    current_time = start_time + timedelta(hours=rnd.uniform(0, 4))
-
-    async with aiohttp.ClientSession() as session:
-        snapped_coords: List[Coordinate] = []
-        for coord in coords:
-            snapped = await snap_to_road(session, coord)
-            snapped_coords.append(snapped)
-
-        # Build timestamps with random gaps between 2–6 hours.
-        for coord in snapped_coords:
-            # Ensure we don't go beyond 'now'
-            if current_time > now:
-                current_time = now - timedelta(minutes=rnd.randint(0, 60))
-            # Fake address: we don't do real reverse geocoding to keep this purely simulated.
-            address = f"Near {coord[0]:.3f}, {coord[1]:.3f}"
-            points.append(
-                FakeLocationPoint(
-                    timestamp=current_time,
-                    coord=coord,
-                    address=address,
-                )
-            )
-            current_time = current_time + timedelta(hours=rnd.uniform(2, 6))
+    current_time = start_time + timedelta(hours=rnd[10] * 4)
 
-        # Ensure points are sorted by time
-        points.sort(key=lambda p: p.timestamp)
+    # Snap all points concurrently; snap_to_road never raises (falls back to input).
+    snapped_coords: List[Coordinate] = list(
+        await asyncio.gather(*(snap_to_road(session, coord) for coord in coords))
+    )
 
-        # Generate static map image with polyline.
+    # Build timestamps with random gaps between 2–6 hours.
+    for coord, gap in zip(snapped_coords, rnd[11:16], strict=True):
+        # Ensure we don't go beyond 'now'. Clamping (rather than stepping back)
+        # keeps the points in time order, so no sort is needed afterwards.
+        current_time = min(current_time, now)
+        # Fake address: we don't do real reverse geocoding to keep this purely simulated.
+        address = f"Near {coord[0]:.3f}, {coord[1]:.3f}"
+        points.append(
+            FakeLocationPoint(
+                timestamp=current_time,
+                coord=coord,
+                address=address,
+            )
+        )
+        current_time = current_time + timedelta(hours=2 + gap * 4)
+
+    # Generate static map image with polyline.
+    map_png = b""
+    if render_map:
         map_png = await generate_static_map(session, [p.coord for p in points])
 
     imei_prefix = imei[:8]
@@ -147,3 +185,40 @@ async def generate_fake_track(imei: str) -> FakeTrackResult:
         map_png=map_png,
         seed_date=now.replace(hour=0, minute=0, second=0, microsecond=0),
     )
+
+
+def pack_track(result: FakeTrackResult) -> bytes:
+    """
+    Serialize a track for the Redis cache.
+
+    msgpack stores the PNG as raw bytes, so there's no base64 step.
+    """
+    return msgpack.packb(
+        {
+            "prefix": result.imei_prefix,
+            "points": [
+                (p.timestamp.isoformat(), p.coord[0], p.coord[1], p.address)
+                for p in result.points
+            ],
+            "png": result.map_png,
+            "seed_date": result.seed_date.isoformat(),
+        }
+    )
+
+
+def unpack_track(data: bytes) -> FakeTrackResult:
+    """Inverse of pack_track()."""
+    raw = msgpack.unpackb(data)
+    return FakeTrackResult(
+        imei_prefix=raw["prefix"],
+        points=[
+            FakeLocationPoint(
+                timestamp=datetime.fromisoformat(ts),
+                coord=(lat, lon),
+                address=address,
+            )
+            for ts, lat, lon, address in raw["points"]
+        ],
+        map_png=raw["png"],
+        seed_date=datetime.fromisoformat(raw["seed_date"]),
+    )
@@ -2,23 +2,21 @@
 Rate limiting using Redis + PostgreSQL logs.
 
 We implement:
-- A daily counter per user (max 3 IMEI checks per day).
-- A small leaky bucket token scheme in Redis for speed.
-
-If Redis is unavailable, we fall back to a very simple limit.
+- A daily counter per user (max 3 IMEI checks per day), enforced by PostgreSQL
+  in the same statement that logs the query.
+- A Redis copy of that counter so users over the limit are rejected without
+  touching the database.
 """
 
 from __future__ import annotations
 
 from dataclasses import dataclass
-from datetime import timedelta
 
 from redis.asyncio import Redis
-from sqlalchemy import func, select
+from sqlalchemy import text
 from sqlalchemy.ext.asyncio import AsyncSession
 
-from src.models.user import IMEIQuery
-from src.utils.time_utils import seconds_until_midnight_utc, utc_now
+from src.utils.time_utils import seconds_until_midnight_utc
 
 
 @dataclass
@@ -31,60 +29,100 @@ class RateLimitStatus:
 DAILY_LIMIT = 3  # Maximum IMEI checks per user per day
 
 
-async def check_rate_limit(
-    redis: Redis,
+# One round trip for the whole Postgres side of an IMEI request:
+# - upsert the users row (DO UPDATE so RETURNING also yields existing rows)
+# - count the user's queries since 00:00 UTC
+# - insert the new imei_queries row only if that count is under the limit
+# All CTEs see the same snapshot, so "today" never includes the row being inserted.
+_RECORD_QUERY_SQL = text(
+    """
+    WITH u AS (
+        INSERT INTO users (id, language_code, created_at)
+        VALUES (:user_id, :language_code, now())
+        ON CONFLICT (id) DO UPDATE SET id = EXCLUDED.id
+        RETURNING id
+    ),
+    today AS (
+        SELECT count(*) AS c
+        FROM imei_queries
+        WHERE user_id = :user_id
+          AND created_at >= date_trunc('day', now() AT TIME ZONE 'UTC') AT TIME ZONE 'UTC'
+    ),
+    ins AS (
+        INSERT INTO imei_queries (user_id, imei_prefix, created_at)
+        SELECT u.id, :imei_prefix, now()
+        FROM u, today
+        WHERE today.c < :daily_limit
+        RETURNING 1
+    )
+    SELECT (SELECT c FROM today), (SELECT count(*) FROM ins)
+    """
+)
+
+
+def _rate_key(user_id: int) -> str:
+    """Redis key holding the user's query count for today."""
+    return f"rate:user:{user_id}:daily"
+
+
+async def consume_token(redis: Redis, user_id: int) -> RateLimitStatus:
+    """
+    Take one check from today's Redis counter (fast path).
+
+    INCR, EXPIRE NX (TTL until midnight, only when the key is new) and TTL go
+    in a single pipelined transaction, so this is one Redis round trip.
+    """
+    key = _rate_key(user_id)
+    async with redis.pipeline(transaction=True) as pipe:
+        pipe.incr(key)
+        pipe.expire(key, seconds_until_midnight_utc(), nx=True)
+        pipe.ttl(key)
+        current, _, ttl = await pipe.execute()
+
+    # Over the limit: we leave the counter above DAILY_LIMIT instead of
+    # decrementing it again; every further call is rejected either way.
+    return RateLimitStatus(
+        allowed=current <= DAILY_LIMIT,
+        remaining=max(0, DAILY_LIMIT - current),
+        reset_in_seconds=ttl if ttl > 0 else seconds_until_midnight_utc(),
+    )
+
+
+async def record_imei_query(
     db: AsyncSession,
     user_id: int,
+    language_code: str | None,
+    imei_prefix: str,
 ) -> RateLimitStatus:
     """
-    Check if user has remaining quota.
+    Ensure the user exists and log the query if today's quota allows it.
 
-    We:
-    - try Redis first (fast path)
-    - backfill from DB if Redis key missing
+    This is a single SQL statement (see _RECORD_QUERY_SQL); the caller commits.
     """
-    key = f"rate:user:{user_id}:daily"
-    ttl = await redis.ttl(key)
-
-    if ttl == -2:
-        # Key doesn't exist -> compute from DB for today and set in Redis.
-        now = utc_now()
-        today_start = now.replace(hour=0, minute=0, second=0, microsecond=0)
-        stmt = (
-            select(func.count())
-            .select_from(IMEIQuery)
-            .where(
-                IMEIQuery.user_id == user_id,
-                IMEIQuery.created_at >= today_start,
-            )
-        )
-        result = await db.execute(stmt)
-        count_today = int(result.scalar_one())
-        remaining = max(0, DAILY_LIMIT - count_today)
-
-        # Set Redis key with TTL until midnight.
-        reset_in = seconds_until_midnight_utc()
-        await redis.set(key, count_today, ex=reset_in)
-    else:
-        # Key exists or no expiry. For simplicity, just read it.
-        val = await redis.get(key)
-        count_today = int(val) if val is not None else 0
-        remaining = max(0, DAILY_LIMIT - count_today)
-        reset_in = seconds_until_midnight_utc()
-
-    allowed = remaining > 0
-    return RateLimitStatus(allowed=allowed, remaining=remaining, reset_in_seconds=reset_in)
-
-
-async def increment_rate_limit(redis: Redis, user_id: int) -> None:
+    result = await db.execute(
+        _RECORD_QUERY_SQL,
+        {
+            "user_id": user_id,
+            "language_code": language_code,
+            "imei_prefix": imei_prefix,
+            "daily_limit": DAILY_LIMIT,
+        },
+    )
+    count_before, inserted = result.one()
+    used = int(count_before) + int(inserted)
+    return RateLimitStatus(
+        allowed=bool(inserted),
+        remaining=max(0, DAILY_LIMIT - used),
+        reset_in_seconds=seconds_until_midnight_utc(),
+    )
+
+
+async def store_rate_limit(redis: Redis, user_id: int, status: RateLimitStatus) -> None:
     """
-    Increment user's usage counter in Redis.
+    Overwrite today's Redis counter with the usage PostgreSQL reported.
 
-    We rely on TTL already being set until midnight.
+    Used when the two disagree, e.g. after Redis lost its data.
     """
-    key = f"rate:user:{user_id}:daily"
-    # Use INCR; if key not exists, Redis will create one.
-    current = await redis.incr(key)
-    if current == 1:
-        # First time today -> set TTL until midnight.
-        await redis.expire(key, seconds_until_midnight_utc())
+    used = DAILY_LIMIT - status.remaining
+    # reset_in_seconds is 0 in the last second of the day; Redis rejects EX 0.
+    await redis.set(_rate_key(user_id), used, ex=max(1, status.reset_in_seconds))